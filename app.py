@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 import json
+from utils.common import start_profiling, profile_phase, show_profiling_panel
 
 # Set up page configuration
 st.set_page_config(
@@ -10,6 +11,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+start_profiling("app")
+
 # Add custom CSS
 st.markdown("""
 <style>
@@ -48,7 +51,7 @@ if 'api_key' not in st.session_state:
     config_file = os.path.join(os.path.dirname(__file__), 'config.json')
     if os.path.exists(config_file):
         try:
-            with open(config_file, 'r') as f:
+            with profile_phase("io"), open(config_file, 'r') as f:
                 config = json.load(f)
                 st.session_state['api_key'] = config.get('api_key', "")
         except:
@@ -85,7 +88,7 @@ with col2:
         # Save to config file
         config_file = os.path.join(os.path.dirname(__file__), 'config.json')
         try:
-            with open(config_file, 'w') as f:
+            with profile_phase("io"), open(config_file, 'w') as f:
                 json.dump({'api_key': st.session_state['api_key']}, f)
             st.success("API key saved!")
         except:
@@ -157,6 +160,18 @@ st.markdown("""
 - [Report Issues](https://github.com/yourusername/segmind-toolkit/issues)
 """)
 
+# Developer options
+with st.sidebar.expander("🛠️ Developer Options"):
+    profiling = st.checkbox(
+        "Profile each rerun",
+        value=st.session_state.get('profiling_enabled', False),
+        help="Show a per-phase timing breakdown on every page and append it to logs/profile.jsonl (memory tracing needs SEGMIND_PROFILE=1 on the server)"
+    )
+    if profiling != st.session_state.get('profiling_enabled', False):
+        st.session_state['profiling_enabled'] = profiling
+
 # Footer
 st.markdown("---")
 st.markdown("Made with ❤️ by [Your Name] | © 2025 | Version 2.0")
+
+show_profiling_panel()
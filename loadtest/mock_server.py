@@ -0,0 +1,120 @@
+import json
+import math
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+# Stand-in for api.segmind.com/v1/* and api.openai.com/v1/images/generations.
+# Point the app at it with SEGMIND_API_BASE / OPENAI_API_BASE = <server.base_url>.
+
+
+# Function to build a noise PNG whose encoded size is roughly `approx_bytes`
+def make_png(approx_bytes):
+    side = max(8, int(math.sqrt(approx_bytes / 3)))
+    pixels = np.random.default_rng(0).integers(0, 256, size=(side, side, 3), dtype=np.uint8)
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class MockApiServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=1.0, jitter=0.2,
+                 payload_bytes=512 * 1024, error_rate=0.0, input_image_bytes=64 * 1024):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.video_payload = os.urandom(payload_bytes)
+        self.image_payload = make_png(payload_bytes)
+        self.input_image = make_png(input_image_bytes)
+        self.stats = {"requests": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def input_image_url(self):
+        return f"{self.base_url}/media/input.png"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Function to simulate upstream processing time and failures
+    def _simulate(self):
+        delay = max(0.0, random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+        time.sleep(delay)
+        failed = random.random() < self.error_rate
+        with self._lock:
+            self.stats["requests"] += 1
+            if failed:
+                self.stats["errors"] += 1
+        return not failed
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/media/input.png":
+                    self._send(200, server.input_image, "image/png")
+                elif self.path.startswith("/media/"):
+                    self._send(200, server.image_payload, "image/png")
+                else:
+                    self._send(404, b"Not found", "text/plain")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+
+                if self.path == "/v1/images/generations":
+                    if server._simulate():
+                        url = f"{server.base_url}/media/generated-{random.getrandbits(32):08x}.png"
+                        body = json.dumps({"created": int(time.time()), "data": [{"url": url}]})
+                        self._send(200, body.encode("utf-8"), "application/json")
+                    else:
+                        body = json.dumps({"error": {"message": "Mock upstream failure"}})
+                        self._send(500, body.encode("utf-8"), "application/json")
+                elif self.path.startswith("/v1/"):
+                    if server._simulate():
+                        self._send(200, server.video_payload, "video/mp4")
+                    else:
+                        self._send(500, b"Mock upstream failure", "text/plain")
+                else:
+                    self._send(404, b"Not found", "text/plain")
+
+        return Handler
@@ -0,0 +1,226 @@
+import time
+
+# Set before the heavy imports; in a session process this marks the start of startup
+PROCESS_STARTED = time.monotonic()
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+from loadtest.mock_server import MockApiServer
+
+# Drives N simulated Streamlit sessions through the Kling, img2video and toy pages
+# against the local mock API and reports latency, throughput, memory and errors.
+# Every session runs in its own process; memory is the growth of that process's
+# peak RSS over the session (imports excluded).
+#
+#   python -m loadtest.run --sessions 20 --concurrency 8 --latency 2 --error-rate 0.05
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(ROOT_DIR, "pages")
+
+
+# Function to find a widget by its label
+def widget(widgets, label):
+    for candidate in widgets:
+        if candidate.label == label:
+            return candidate
+    raise LookupError(f"No widget labelled {label!r}")
+
+
+# Function to check the outcome of the generation rerun
+def failed(at):
+    return bool(at.exception) or bool(at.error)
+
+
+# Session scripts: each prepares the page and returns the AppTest plus the label of the button to time
+# (result reuse is switched off so every click reaches the mock API)
+def prepare_kling(input_image_url, timeout):
+    at = AppTest.from_file(os.path.join(PAGES_DIR, "01_Kling_Image2Video.py"), default_timeout=timeout)
+    at.session_state["api_key"] = "load-test"
+    at.run()
+    widget(at.radio, "Select image source").set_value("URL").run()
+    widget(at.checkbox, "Reuse results for near-identical images").set_value(False)
+    widget(at.text_input, "Image URL").set_value(input_image_url).run()
+    return at, "🎬 Generate Video"
+
+
+def prepare_img2video(input_image_url, timeout):
+    at = AppTest.from_file(os.path.join(PAGES_DIR, "img2video.py"), default_timeout=timeout)
+    at.run()
+    widget(at.text_input, "🔐 API Key").set_value("load-test")
+    widget(at.checkbox, "♻️ Reuse results for near-identical images").set_value(False)
+    widget(at.text_input, "🌐 Or paste an image URL").set_value(input_image_url).run()
+    return at, "🚀 Generate Video"
+
+
+def prepare_toy(input_image_url, timeout):
+    at = AppTest.from_file(os.path.join(PAGES_DIR, "toy.py"), default_timeout=timeout)
+    at.run()
+    widget(at.sidebar.text_input, "Enter your OpenAI API Key").set_value("load-test").run()
+    return at, "✨ Generate Toy Image"
+
+
+SCENARIOS = {
+    "kling": prepare_kling,
+    "img2video": prepare_img2video,
+    "toy": prepare_toy,
+}
+
+
+# Function to read this process's peak resident memory in bytes
+def peak_rss():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Function to run one simulated user session in its own process and collect
+# per-generation timings. AppTest swaps process-wide Streamlit state on every
+# run, so sessions must never share a process. Windows use time.monotonic(),
+# which is comparable across processes, so the parent can line them up.
+def run_session(name, env, input_image_url, iterations, timeout):
+    # Must be set before the pages first import utils.common
+    os.environ.update(env)
+    # Streamlit's media file manager leaves this coroutine behind when the process exits
+    warnings.filterwarnings("ignore", message="coroutine 'expire_cache' was never awaited")
+    baseline_rss = peak_rss()
+
+    result = {"latencies": [], "errors": 0, "window": None, "setup_failure": None}
+    try:
+        at, button_label = SCENARIOS[name](input_image_url, timeout)
+    except Exception as e:
+        result.update(errors=iterations, setup_failure=f"{type(e).__name__}: {e}")
+        result["memory"] = peak_rss() - baseline_rss
+        return result
+
+    # Process spawn, imports and the setup reruns are startup, not load
+    window_start = time.monotonic()
+    result["startup"] = window_start - PROCESS_STARTED
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            at = widget(at.button, button_label).click().run()
+            if failed(at):
+                result["errors"] += 1
+        except Exception:
+            result["errors"] += 1
+        result["latencies"].append(time.perf_counter() - start)
+    result["window"] = (window_start, time.monotonic())
+    result["memory"] = peak_rss() - baseline_rss
+    return result
+
+
+# Function to measure the total time covered by a set of (start, end) windows
+def union_length(windows):
+    total, current_start, current_end = 0.0, None, None
+    for start, end in sorted(windows):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+# Function to load-test one page and summarise the results
+def run_scenario(name, server, env, sessions, concurrency, iterations, timeout):
+    # One fresh process per session (max_tasks_per_child=1); `concurrency` processes at a time
+    with ProcessPoolExecutor(
+        max_workers=concurrency,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1
+    ) as executor:
+        futures = [
+            executor.submit(run_session, name, env, server.input_image_url, iterations, timeout)
+            for _ in range(sessions)
+        ]
+        results = [future.result() for future in futures]
+
+    latencies = [latency for result in results for latency in result["latencies"]]
+    errors = sum(result["errors"] for result in results)
+    attempts = sessions * iterations
+    # Throughput only counts time in which at least one session was in its timed loop
+    busy = union_length([result["window"] for result in results if result["window"]])
+    startups = [result["startup"] for result in results if "startup" in result]
+
+    return {
+        "page": name,
+        "sessions": sessions,
+        "requests": attempts,
+        "errors": errors,
+        "error_rate": errors / attempts if attempts else 0.0,
+        "p50": float(np.percentile(latencies, 50)) if latencies else float("nan"),
+        "p99": float(np.percentile(latencies, 99)) if latencies else float("nan"),
+        "throughput": (attempts - errors) / busy if busy else 0.0,
+        "startup": float(np.mean(startups)) if startups else float("nan"),
+        "memory_per_session": float(np.mean([result["memory"] for result in results])),
+        "setup_failures": [result["setup_failure"] for result in results if result["setup_failure"]],
+    }
+
+
+# Function to print the summary table
+def print_report(reports):
+    header = (
+        f"{'page':<10} {'sessions':>8} {'reqs':>6} {'err %':>7} {'p50 s':>8} {'p99 s':>8} "
+        f"{'req/s':>8} {'startup s':>10} {'MiB/sess':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for report in reports:
+        print(
+            f"{report['page']:<10} {report['sessions']:>8} {report['requests']:>6} "
+            f"{report['error_rate'] * 100:>7.1f} {report['p50']:>8.2f} {report['p99']:>8.2f} "
+            f"{report['throughput']:>8.2f} {report['startup']:>10.2f} {report['memory_per_session'] / 2**20:>9.2f}"
+        )
+        for message in sorted(set(report["setup_failures"])):
+            print(f"  setup failure: {message}")
+    print("\nreq/s counts only time when a session was in its timed loop; startup s is the mean")
+    print("time a session process spent on imports and setup reruns before that loop.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-session load test against a mock Segmind/OpenAI API")
+    parser.add_argument("--pages", nargs="+", choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    parser.add_argument("--sessions", type=int, default=10, help="Simulated sessions per page")
+    parser.add_argument("--concurrency", type=int, default=4, help="Session processes running at the same time")
+    parser.add_argument("--iterations", type=int, default=3, help="Generations per session")
+    parser.add_argument("--latency", type=float, default=1.0, help="Mean mock API latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Standard deviation of the latency")
+    parser.add_argument("--payload-kb", type=int, default=512, help="Size of mock images/videos returned")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API calls that fail")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-rerun AppTest timeout in seconds")
+    args = parser.parse_args(argv)
+
+    with MockApiServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        payload_bytes=args.payload_kb * 1024,
+        error_rate=args.error_rate
+    ) as server:
+        env = {
+            "SEGMIND_API_BASE": f"{server.base_url}/v1",
+            "OPENAI_API_BASE": f"{server.base_url}/v1",
+        }
+
+        reports = [
+            run_scenario(page, server, env, args.sessions, args.concurrency, args.iterations, args.timeout)
+            for page in args.pages
+        ]
+
+    print_report(reports)
+    print(f"\nMock server handled {server.stats['requests']} API calls ({server.stats['errors']} injected failures)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
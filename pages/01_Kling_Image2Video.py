@@ -4,9 +4,12 @@ import os
 
 # Add the root directory to the path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.common import get_api_key, get_image_input, make_segmind_api_request, show_result
+from utils.common import get_api_key, get_image_input, make_segmind_api_request, show_result, show_remote_image
+from utils.common import start_profiling, show_profiling_panel
+from utils.common import find_previous_result, remember_result, perceptual_hash, PHASH_THRESHOLD, PHASH_THRESHOLD_MAX
 
 st.set_page_config(page_title="Kling Image2Video | Segmind Toolkit", page_icon="🎬", layout="wide")
+start_profiling("kling_image2video")
 
 st.title("🎬 Kling 1.6: Image to Video")
 st.markdown("Transform static images into dynamic, cinematic videos with Kling 1.6")
@@ -63,6 +66,19 @@ with col2:
             1, 10, 4,
             help="Length of the generated video"
         )
+        
+        reuse_results = st.checkbox(
+            "Reuse results for near-identical images",
+            value=True,
+            help="If a visually identical image was already animated with these exact settings, show that video instead of starting a new job"
+        )
+        
+        similarity_threshold = st.slider(
+            "Similarity Threshold",
+            0, PHASH_THRESHOLD_MAX, PHASH_THRESHOLD,
+            disabled=not reuse_results,
+            help="Maximum perceptual-hash distance (out of 64 bits) to treat two images as the same. Lower = stricter"
+        )
 
 # Generation section
 st.markdown("---")
@@ -86,11 +102,25 @@ if generate_button:
             "duration": duration
         }
         
-        # Make API request
-        result, error = make_segmind_api_request("kling-1.6-image2video", payload)
+        params = {key: value for key, value in payload.items() if key != "image"}
+        phash = perceptual_hash(image_base64)
+        api_key = st.session_state.get('api_key', "")
+        previous = None
+        if reuse_results:
+            previous = find_previous_result(phash, "kling-1.6-image2video", params, api_key, similarity_threshold)
         
-        # Show result
-        show_result(result, error, "mp4")
+        if previous:
+            distance, result = previous
+            st.info(f"♻️ This image matches one you already animated with the same settings (distance {distance}/64), so the earlier video is shown. Untick \"Reuse results\" to generate a new one.")
+            show_result(result, None, "mp4")
+        else:
+            # Make API request
+            result, error = make_segmind_api_request("kling-1.6-image2video", payload)
+            if result:
+                remember_result(phash, "kling-1.6-image2video", params, api_key, result)
+            
+            # Show result
+            show_result(result, error, "mp4")
 
 # Example Gallery
 st.markdown("---")
@@ -101,17 +131,17 @@ example_col1, example_col2, example_col3 = st.columns(3)
 
 with example_col1:
     st.markdown("**Nature Landscape**")
-    st.image("https://placehold.co/600x400/png?text=Example+1")
+    show_remote_image("https://placehold.co/600x400/png?text=Example+1")
     st.markdown("*Prompt: Serene mountain landscape, gentle wind, cinematic*")
 
 with example_col2:
     st.markdown("**Portrait Animation**")
-    st.image("https://placehold.co/600x400/png?text=Example+2")
+    show_remote_image("https://placehold.co/600x400/png?text=Example+2")
     st.markdown("*Prompt: Professional portrait, subtle expressions, studio lighting*")
 
 with example_col3:
     st.markdown("**Urban Scene**")
-    st.image("https://placehold.co/600x400/png?text=Example+3")
+    show_remote_image("https://placehold.co/600x400/png?text=Example+3")
     st.markdown("*Prompt: Busy city street, people walking, cars moving, rain*")
 
 # Tips section
@@ -124,3 +154,5 @@ st.markdown("""
 - For portraits, subtle movements work best
 - Longer durations may dilute the quality of the animation
 """)
+
+show_profiling_panel()
@@ -0,0 +1,129 @@
+import streamlit as st
+import sys
+import os
+import base64
+import math
+from io import BytesIO
+from PIL import Image
+
+# Add the root directory to the path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.common import get_api_key, get_image_input, show_result, tile_positions, upscale_image_tiled
+from utils.common import UPSCALE_MAX_OUTPUT_PIXELS
+from utils.common import start_profiling, profile_phase, show_profiling_panel
+
+st.set_page_config(page_title="RealESRGAN Upscaling | Segmind Toolkit", page_icon="🔍", layout="wide")
+start_profiling("realesrgan_upscaling")
+
+st.title("🔍 RealESRGAN Upscaling")
+st.markdown("Enhance low-resolution property images with RealESRGAN. Large images are split into tiles and upscaled in parallel.")
+
+# Page layout
+col1, col2 = st.columns([2, 1])
+
+with col1:
+    # Image Input
+    st.subheader("Input Image")
+    image_base64, image_preview = get_image_input("Select an image to upscale")
+
+with col2:
+    # Parameters
+    st.subheader("Upscaling Parameters")
+
+    scale = st.selectbox(
+        "Scale Factor",
+        [2, 4],
+        index=0,
+        help="How many times larger the output should be"
+    )
+
+    advanced_options = st.expander("Tiling Options")
+
+    with advanced_options:
+        tile_size = st.slider(
+            "Tile Size (px)",
+            256, 1024, 512,
+            step=64,
+            help="Images larger than this are split into tiles before upscaling"
+        )
+
+        overlap = st.slider(
+            "Tile Overlap (px)",
+            8, 128, 32,
+            step=8,
+            help="Overlap between neighbouring tiles, blended to hide seams"
+        )
+
+        concurrency = st.slider(
+            "Concurrent Requests",
+            1, 8, 4,
+            help="Number of tiles sent to the API at the same time"
+        )
+
+# Tiling summary
+source_image = None
+if image_base64:
+    try:
+        with profile_phase("encoding"):
+            source_image = Image.open(BytesIO(base64.b64decode(image_base64)))
+            width, height = source_image.size
+    except Exception as e:
+        st.error(f"Could not read the input as an image: {e}")
+
+if source_image:
+    if width * height * scale * scale > UPSCALE_MAX_OUTPUT_PIXELS:
+        st.error(
+            f"Output would be {width * scale}×{height * scale}px, above the "
+            f"{UPSCALE_MAX_OUTPUT_PIXELS / 1_000_000:.0f} megapixel limit. Choose a smaller scale or input."
+        )
+        source_image = None
+    else:
+        tile_count = len(tile_positions(width, tile_size, overlap)) * len(tile_positions(height, tile_size, overlap))
+        st.info(
+            f"Input {width}×{height}px → output {width * scale}×{height * scale}px · "
+            f"{tile_count} tile(s) in {math.ceil(tile_count / concurrency)} round(s)"
+        )
+
+# Generation section
+st.markdown("---")
+col1, col2, col3 = st.columns([1, 1, 1])
+
+with col2:
+    generate_button = st.button("🔍 Upscale Image", use_container_width=True)
+
+if generate_button:
+    if not source_image:
+        st.error("Please provide a valid image first.")
+    else:
+        api_key = get_api_key()
+        if api_key:
+            progress = st.progress(0.0, text="Upscaling tiles...")
+
+            def update_progress(done, total):
+                progress.progress(done / total, text=f"Upscaled {done}/{total} tiles")
+
+            result, error = upscale_image_tiled(
+                source_image,
+                scale=scale,
+                tile_size=tile_size,
+                overlap=overlap,
+                max_workers=concurrency,
+                api_key=api_key,
+                progress_callback=update_progress
+            )
+            progress.empty()
+
+            # Show result
+            show_result(result, error, "png")
+
+# Tips section
+st.markdown("---")
+st.subheader("💡 Tips for Best Results")
+st.markdown("""
+- Start from the sharpest source image available; upscaling cannot recover heavy compression artefacts
+- Increase the tile overlap if you notice seams on smooth surfaces such as walls or skies
+- Smaller tiles finish faster individually, but produce more requests
+- Higher concurrency reduces total time, up to your API rate limit
+""")
+
+show_profiling_panel()
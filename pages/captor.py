@@ -2,6 +2,12 @@ import streamlit as st
 from PIL import Image
 import openai
 import io
+import sys
+import os
+
+# Add the root directory to the path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.common import start_profiling, profile_phase, show_profiling_panel, show_remote_image
 
 # Replace with your OpenAI API Key
 openai.api_key = st.secrets.get("OPENAI_API_KEY", "your-api-key-here")
@@ -13,6 +19,7 @@ def generate_kling_image(prompt, image):
     return img
 
 # Actual DALL·E generation function
+@profile_phase("network")
 def generate_dalle_image(prompt):
     try:
         response = openai.Image.create(
@@ -29,6 +36,7 @@ def generate_dalle_image(prompt):
 
 # App UI
 st.set_page_config(page_title="Capsule Pic Generator", layout="centered")
+start_profiling("captor")
 st.title("📸 Chibi Capsule Pic Generator")
 
 st.sidebar.header("🧠 Generation Settings")
@@ -61,12 +69,14 @@ if submitted and uploaded_image:
 
         if model_choice == "Kling (Simulated)":
             result_image = generate_kling_image(prompt, image)
-            st.image(result_image, caption="🎉 Your Chibi Capsule Pic", use_column_width=True)
+            with profile_phase("st.image"):
+                st.image(result_image, caption="🎉 Your Chibi Capsule Pic", use_column_width=True)
 
         elif model_choice == "OpenAI DALL·E 3":
             dalle_url = generate_dalle_image(prompt)
             if dalle_url:
-                st.image(dalle_url, caption="🎉 Your Chibi Capsule Pic (DALL·E 3)", use_column_width=True)
+                # Fetched right away: DALL·E URLs expire, the cached copy doesn't
+                show_remote_image(dalle_url, caption="🎉 Your Chibi Capsule Pic (DALL·E 3)", use_column_width=True)
 
 elif submitted and not uploaded_image:
     st.warning("Please upload a photo to continue.")
@@ -74,3 +84,4 @@ elif submitted and not uploaded_image:
 st.markdown("---")
 st.markdown("Created with 💙 using Streamlit, OpenAI DALL·E, and Kling.")
 
+show_profiling_panel()
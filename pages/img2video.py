@@ -4,6 +4,14 @@ from PIL import Image
 import base64
 import io
 import re
+import sys
+import os
+
+# Add the root directory to the path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.common import start_profiling, profile_phase, show_profiling_panel, SEGMIND_API_BASE
+from utils.common import find_previous_result, remember_result, perceptual_hash, PHASH_THRESHOLD, PHASH_THRESHOLD_MAX
+from utils.common import fetch_media, show_remote_image
 
 # ---------- Image Base64 Handling ----------
 def image_to_base64(image: Image.Image) -> str:
@@ -11,6 +19,7 @@ def image_to_base64(image: Image.Image) -> str:
     image.save(buffer, format="JPEG", quality=95)
     return base64.b64encode(buffer.getvalue()).decode("utf-8")
 
+@profile_phase("encoding")
 def uploaded_file_to_base64(uploaded_file) -> str:
     try:
         image = Image.open(uploaded_file)
@@ -43,19 +52,33 @@ def convert_to_direct_link(url: str) -> str:
 
 def fetch_image_base64_from_url(image_url: str) -> str:
     try:
-        response = requests.get(image_url)
-        response.raise_for_status()
-        content_type = response.headers.get("Content-Type", "")
+        content, content_type = fetch_media(image_url)
         if "image" not in content_type:
             raise ValueError("URL does not point to an image.")
-        image = Image.open(io.BytesIO(response.content))
+        image = Image.open(io.BytesIO(content))
         return image_to_base64(image)
     except Exception as e:
         st.error(f"❌ Error fetching image from URL: {e}")
         return None
 
+# ---------- Video Output ----------
+def show_video(video_bytes):
+    # Show the video player in the app
+    video_path = io.BytesIO(video_bytes)
+    with profile_phase("st.image"):
+        st.video(video_path, format="video/mp4")
+
+    # Provide download button for the video
+    st.download_button(
+        label="⬇️ Download MP4",
+        data=video_bytes,
+        file_name="generated_video.mp4",
+        mime="video/mp4"
+    )
+
 # ---------- Streamlit UI ----------
 st.set_page_config(page_title="Image to Video", layout="centered")
+start_profiling("img2video")
 st.title("🖼️➡️🎥 Image to Video Generator (Enhanced Upload Handling)")
 st.markdown("Upload an image or paste a Dropbox/Google Drive image link to generate a video using the Segmind Kling API.")
 
@@ -68,11 +91,12 @@ display_url = None
 
 # Handling uploaded file or URL input
 if uploaded_file:
-    st.image(uploaded_file, caption="Uploaded Image", use_container_width=True)
+    with profile_phase("st.image"):
+        st.image(uploaded_file, caption="Uploaded Image", use_column_width=True)
     image_b64 = uploaded_file_to_base64(uploaded_file)
 elif image_url:
     direct_url = convert_to_direct_link(image_url)
-    st.image(direct_url, caption="Image from URL", use_container_width=True)
+    show_remote_image(direct_url, caption="Image from URL", use_column_width=True)
     image_b64 = fetch_image_base64_from_url(direct_url)
     display_url = direct_url
 
@@ -82,6 +106,12 @@ st.subheader("🎯 Prompt Settings")
 api_key = st.text_input("🔐 API Key", type="password")
 prompt = st.text_area("📝 Prompt", "A futuristic flying car over a cyberpunk city at night.")
 negative_prompt = st.text_area("🚫 Negative Prompt", "Low resolution, distorted, blurry")
+reuse_results = st.checkbox("♻️ Reuse results for near-identical images", value=True)
+similarity_threshold = st.slider(
+    "Similarity threshold (perceptual-hash bits)", 0, PHASH_THRESHOLD_MAX, PHASH_THRESHOLD,
+    disabled=not reuse_results,
+    help="Images within this distance of an earlier input with the same prompts reuse its video. Lower = stricter"
+)
 
 # Generate video on button click
 if st.button("🚀 Generate Video"):
@@ -90,40 +120,42 @@ if st.button("🚀 Generate Video"):
     elif not api_key:
         st.error("❌ API key is required.")
     else:
-        with st.spinner("Generating video..."):
-            payload = {
-                "image": image_b64,
-                "prompt": prompt,
-                "negative_prompt": negative_prompt,
-                "cfg_scale": 0.5,
-                "mode": "pro",
-                "duration": 5  # video duration in seconds
-            }
-            try:
-                res = requests.post(
-                    "https://api.segmind.com/v1/kling-image2video",
-                    json=payload,
-                    headers={"x-api-key": api_key},
-                    timeout=600
-                )
-                if res.status_code == 200:
-                    st.success("✅ Video generated successfully!")
-                    
-                    # Show the video player in the app
-                    video_path = io.BytesIO(res.content)
-                    st.video(video_path, format="video/mp4")
-
-                    # Provide download button for the video
-                    st.download_button(
-                        label="⬇️ Download MP4",
-                        data=res.content,
-                        file_name="generated_video.mp4",
-                        mime="video/mp4"
-                    )
-                else:
-                    st.error(f"❌ API Error: {res.status_code} - {res.text}")
-            except Exception as e:
-                st.error(f"❌ Exception: {e}")
+        payload = {
+            "image": image_b64,
+            "prompt": prompt,
+            "negative_prompt": negative_prompt,
+            "cfg_scale": 0.5,
+            "mode": "pro",
+            "duration": 5  # video duration in seconds
+        }
+        params = {key: value for key, value in payload.items() if key != "image"}
+        phash = perceptual_hash(image_b64)
+        previous = None
+        if reuse_results:
+            previous = find_previous_result(phash, "kling-image2video", params, api_key, similarity_threshold)
+
+        if previous:
+            distance, video_bytes = previous
+            st.info(f"♻️ This image matches an earlier one with the same prompts (distance {distance}/64), so its video is shown. Untick reuse to generate a new one.")
+            show_video(video_bytes)
+        else:
+            with st.spinner("Generating video..."):
+                try:
+                    with profile_phase("network"):
+                        res = requests.post(
+                            f"{SEGMIND_API_BASE}/kling-image2video",
+                            json=payload,
+                            headers={"x-api-key": api_key},
+                            timeout=600
+                        )
+                    if res.status_code == 200:
+                        st.success("✅ Video generated successfully!")
+                        remember_result(phash, "kling-image2video", params, api_key, res.content)
+                        show_video(res.content)
+                    else:
+                        st.error(f"❌ API Error: {res.status_code} - {res.text}")
+                except Exception as e:
+                    st.error(f"❌ Exception: {e}")
 
 # ---------- Debug Info ----------
 with st.expander("🛠️ Debug Info"):
@@ -134,3 +166,5 @@ with st.expander("🛠️ Debug Info"):
         # Show only the first 300 characters of the base64 string
         st.markdown("**Base64 Image Data (first 300 characters):**")
         st.code(image_b64[:300] + "...", language="text")
+
+show_profiling_panel()
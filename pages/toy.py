@@ -1,6 +1,13 @@
 import streamlit as st
 import requests
 import base64
+import asyncio
+import sys
+import os
+
+# Add the root directory to the path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.common import start_profiling, profile_phase, show_profiling_panel, OPENAI_API_BASE
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -8,6 +15,7 @@ st.set_page_config(
     layout="centered",
     initial_sidebar_state="expanded"
 )
+start_profiling("toy")
 
 # --- Initialize Session State ---
 for key, default in {
@@ -51,11 +59,13 @@ with st.sidebar.form("toy_creator_form"):
     brand_logo = st.text_input("Brand/logo", value="Mattel logo")
     reference_image = st.file_uploader("Upload reference image (optional)", type=["jpg", "jpeg", "png"])
 
-    image_size = st.selectbox(
-        "Image Size",
-        options=["512x512", "1024x1024"],
-        index=1
+    image_sizes = st.multiselect(
+        "Image Sizes",
+        options=["1024x1024", "1792x1024", "1024x1792"],
+        default=["1024x1024"],
+        help="Sizes supported by DALL·E 3; variants are generated in parallel"
     )
+    variants = st.slider("Variants per size", 1, 4, 1)
 
     submitted = st.form_submit_button("✨ Generate Toy Image")
 
@@ -73,8 +83,14 @@ def build_prompt():
         prompt += " Base the character’s appearance closely on the uploaded image."
     return prompt
 
-# --- Image Generation Function ---
-def generate_image(prompt, api_key, size):
+# --- Image Generation Pipeline ---
+# Each variant is its own DALL·E request (dall-e-3 only accepts n=1). All of them
+# run concurrently and each download starts as soon as its own URL comes back,
+# so several variants take about as long as one. At most
+# MAX_CONCURRENT_GENERATIONS run at once to stay within OpenAI rate limits.
+MAX_CONCURRENT_GENERATIONS = 4
+
+async def generate_image(prompt, api_key, size):
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
@@ -87,50 +103,82 @@ def generate_image(prompt, api_key, size):
     }
 
     try:
-        response = requests.post("https://api.openai.com/v1/images/generations", headers=headers, json=data)
+        response = await asyncio.to_thread(
+            requests.post, f"{OPENAI_API_BASE}/images/generations", headers=headers, json=data, timeout=300
+        )
         if response.status_code == 200:
             image_url = response.json()["data"][0]["url"]
-            image_response = requests.get(image_url)
-            return image_response.content
+            image_response = await asyncio.to_thread(requests.get, image_url, timeout=120)
+            image_response.raise_for_status()
+            return image_response.content, None
         else:
             error = response.json().get("error", {}).get("message", "Unknown error")
-            st.error(f"Image generation failed: {error}")
-            return None
+            return None, f"Image generation failed: {error}"
     except Exception as e:
-        st.error(f"An unexpected error occurred: {e}")
-        return None
+        return None, f"An unexpected error occurred: {e}"
+
+async def generate_variants(prompt, api_key, sizes, variants, on_result):
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_GENERATIONS)
+
+    async def run(size):
+        async with semaphore:
+            return size, await generate_image(prompt, api_key, size)
+
+    tasks = [asyncio.create_task(run(size)) for size in sizes for _ in range(variants)]
+    for completed in asyncio.as_completed(tasks):
+        size, (image_data, error) = await completed
+        on_result(size, image_data, error)
 
 # --- Form Submission Logic ---
 if submitted:
     if not st.session_state.api_key.strip():
         st.error("🔑 Please enter your OpenAI API key to generate the image.")
+    elif not image_sizes:
+        st.error("📐 Please choose at least one image size.")
     else:
         st.session_state.reference_image = reference_image
         prompt = build_prompt()
         st.session_state.prompt_built = prompt
 
-        with st.spinner("🧠 Creating your toy image..."):
-            image_data = generate_image(prompt, st.session_state.api_key, image_size)
-            if image_data:
-                st.session_state.image_bytes = image_data
-                st.session_state.generated_image = image_data
-                st.session_state.image_history.append({
-                    "image": image_data,
-                    "prompt": prompt,
-                    "size": image_size
-                })
+        total = len(image_sizes) * variants
+        progress = st.progress(0.0, text=f"🧠 Creating {total} toy image(s)...")
+        finished = []
+
+        # Runs on the script thread as each variant lands, so results go straight into history;
+        # it is profiled as widgets so only the awaited I/O counts as network time
+        @profile_phase("widgets")
+        def store_result(size, image_data, error):
+            finished.append(size)
+            progress.progress(len(finished) / total, text=f"🧠 {len(finished)}/{total} toy image(s) done")
+            if error:
+                st.error(error)
+                return
+            st.session_state.image_bytes = image_data
+            st.session_state.generated_image = image_data
+            st.session_state.image_history.append({
+                "image": image_data,
+                "prompt": prompt,
+                "size": size
+            })
+
+        with profile_phase("network"):
+            asyncio.run(generate_variants(prompt, st.session_state.api_key, image_sizes, variants, store_result))
+        progress.empty()
 
 # --- Display Uploaded Image ---
 if st.session_state.reference_image and not submitted:
     st.subheader("📸 Uploaded Reference Image")
-    st.image(st.session_state.reference_image, use_column_width=True)
+    with profile_phase("st.image"):
+        st.image(st.session_state.reference_image, use_column_width=True)
 
 # --- Display Generated Image ---
 if st.session_state.generated_image:
     st.subheader("🧸 Your Custom 3D Toy")
-    st.image(st.session_state.generated_image, use_column_width=True)
+    with profile_phase("st.image"):
+        st.image(st.session_state.generated_image, use_column_width=True)
 
-    b64 = base64.b64encode(st.session_state.generated_image).decode()
+    with profile_phase("encoding"):
+        b64 = base64.b64encode(st.session_state.generated_image).decode()
     st.markdown(f'<a href="data:image/png;base64,{b64}" download="custom_toy.png">📥 Download Image</a>', unsafe_allow_html=True)
 
 # --- Display Image History ---
@@ -138,10 +186,13 @@ if st.session_state.image_history:
     with st.expander("📜 View Generated Image History"):
         for idx, item in enumerate(st.session_state.image_history):
             st.markdown(f"### Image #{idx + 1} - Size: {item['size']}")
-            st.image(item["image"], use_column_width=True)
-            with st.expander("🔍 View Prompt"):
-                st.code(item["prompt"])
-            b64_hist = base64.b64encode(item["image"]).decode()
+            with profile_phase("st.image"):
+                st.image(item["image"], use_column_width=True)
+            # Expanders can't be nested, so the prompt is shown inline
+            st.caption("🔍 Prompt")
+            st.code(item["prompt"])
+            with profile_phase("encoding"):
+                b64_hist = base64.b64encode(item["image"]).decode()
             st.markdown(f'<a href="data:image/png;base64,{b64_hist}" download="custom_toy_{idx + 1}.png">📥 Download Image</a>', unsafe_allow_html=True)
 
 # --- Clear History Option ---
@@ -151,3 +202,5 @@ if st.session_state.image_history:
         st.session_state.generated_image = None
         st.session_state.image_bytes = None
         st.experimental_rerun()
+
+show_profiling_panel()
@@ -0,0 +1,5 @@
+import sys
+import os
+
+# Add the root directory to the path to import utils
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
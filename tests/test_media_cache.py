@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from utils.common import MediaCache
+
+
+def test_lru_eviction_keeps_byte_accounting():
+    cache = MediaCache(max_bytes=25)
+    fetch = lambda url: (url.encode() * 10, "image/png")
+    cache.get("a", fetch)
+    cache.get("b", fetch)
+    cache.get("a", fetch)  # most recently used
+    cache.get("c", fetch)
+    assert list(cache._entries) == ["a", "c"]
+    assert cache.size == 20
+
+
+def test_oversized_entries_are_returned_but_not_stored():
+    cache = MediaCache(max_bytes=5)
+    assert cache.get("big", lambda url: (b"x" * 6, "image/png")) == (b"x" * 6, "image/png")
+    assert cache.size == 0
+    assert not cache._entries
+
+
+def test_failures_are_remembered_and_not_cached():
+    cache = MediaCache()
+    calls = []
+
+    def fetch(url):
+        calls.append(url)
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        cache.get("u", fetch)
+    raised = []
+    for _ in range(2):
+        with pytest.raises(OSError, match="ConnectionError: down") as info:
+            cache.get("u", fetch)
+        raised.append(info.value)
+    assert raised[0] is not raised[1]
+    assert calls == ["u"]
+    assert not cache._entries
+    assert not cache._fetch_locks
+
+
+def test_failures_expire_and_are_capped(monkeypatch):
+    import utils.common as common
+
+    monkeypatch.setattr(common, "MEDIA_FAILURE_MAX_ENTRIES", 3)
+    cache = MediaCache()
+
+    def fetch(url):
+        raise ConnectionError(url)
+
+    for index in range(5):
+        with pytest.raises(ConnectionError):
+            cache.get(f"u{index}", fetch)
+    assert list(cache._failures) == ["u2", "u3", "u4"]
+
+    now = time.time()
+    monkeypatch.setattr(common.time, "time", lambda: now + common.MEDIA_FAILURE_TTL + 1)
+    assert cache.get("u4", lambda url: (b"ok", "image/png")) == (b"ok", "image/png")
+    assert not cache._failures
+
+
+def test_concurrent_requests_fetch_each_url_once():
+    cache = MediaCache()
+    calls = []
+    calls_lock = threading.Lock()
+
+    def fetch(url):
+        with calls_lock:
+            calls.append(url)
+        time.sleep(0.01)
+        return b"data", "image/png"
+
+    start = threading.Barrier(32)
+
+    def worker(index):
+        start.wait()
+        for _ in range(20):
+            assert cache.get(f"url-{index % 4}", fetch) == (b"data", "image/png")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(calls) == ["url-0", "url-1", "url-2", "url-3"]
+    assert not cache._fetch_locks
+
+
+def test_request_during_store_does_not_fetch_again():
+    storing = threading.Event()
+    calls = []
+
+    class SlowStoreCache(MediaCache):
+        def _store(self, url, entry):
+            storing.set()
+            time.sleep(0.05)
+            super()._store(url, entry)
+
+    def fetch(url):
+        calls.append(url)
+        return b"data", "image/png"
+
+    cache = SlowStoreCache()
+    first = threading.Thread(target=cache.get, args=("u", fetch))
+    first.start()
+    storing.wait()
+    assert cache.get("u", fetch) == (b"data", "image/png")
+    first.join()
+    assert calls == ["u"]
+
+
+def show_html_share_link():
+    from utils.common import show_remote_image
+
+    show_remote_image("https://example.com/share", caption="Preview")
+
+
+def test_show_remote_image_falls_back_to_url_for_non_images(monkeypatch):
+    import utils.common as common
+
+    monkeypatch.setattr(common, "fetch_media", lambda url: (b"<html>consent</html>", "text/html"))
+    at = AppTest.from_function(show_html_share_link).run()
+    assert not at.exception
+    assert at.get("imgs")[0].proto.imgs[0].url == "https://example.com/share"
@@ -0,0 +1,82 @@
+import base64
+import random
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from utils.common import PerceptualHashIndex, ResultStore, perceptual_hash
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def encode(image, format="PNG", **kwargs):
+    buffer = BytesIO()
+    image.save(buffer, format=format, **kwargs)
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def test_nearest_matches_brute_force():
+    rng = random.Random(0)
+    hashes = [rng.getrandbits(64) for _ in range(500)]
+    index = PerceptualHashIndex(hashes)
+    for _ in range(200):
+        query = rng.choice(hashes) ^ rng.getrandbits(64) & rng.getrandbits(64) & rng.getrandbits(64)
+        for threshold in (0, 4, 10):
+            expected = min(hamming(query, h) for h in hashes)
+            match = index.nearest(query, threshold)
+            if expected <= threshold:
+                assert match is not None and match[0] == expected
+                assert hamming(query, match[1]) == expected
+            else:
+                assert match is None
+
+
+def test_index_ignores_duplicate_hashes():
+    index = PerceptualHashIndex([5, 5, 7])
+    assert len(index) == 2
+    assert index.nearest(5, 0) == (0, 5)
+
+
+def test_perceptual_hash_survives_resize_and_recompression():
+    rng = np.random.default_rng(1)
+    pixels = np.kron(rng.integers(0, 256, size=(16, 16, 3)), np.ones((32, 32, 1))).astype(np.uint8)
+    image = Image.fromarray(pixels)
+    original = perceptual_hash(encode(image))
+    resaved = perceptual_hash(encode(image.resize((300, 300)), "JPEG", quality=70))
+    other = perceptual_hash(encode(Image.fromarray(255 - pixels)))
+    assert hamming(original, resaved) <= 6
+    assert hamming(original, other) > 20
+
+
+def test_store_evicts_least_recently_used_by_bytes():
+    store = ResultStore(max_bytes=30)
+    store.add("a", 0b0000, b"x" * 10)
+    store.add("a", 0b1111, b"y" * 10)
+    store.add("b", 0b0000, b"z" * 10)
+    assert store.nearest("a", 0b0001, 1) == (1, b"x" * 10)  # refreshes (a, 0b0000)
+
+    store.add("b", 0b1111, b"w" * 10)
+    assert store.size == 30
+    assert store.nearest("a", 0b1111, 0) is None
+    assert store.nearest("a", 0b0000, 0) == (0, b"x" * 10)
+
+
+def test_store_drops_empty_scopes_and_oversized_results():
+    store = ResultStore(max_bytes=10)
+    store.add("a", 1, b"x" * 10)
+    store.add("b", 1, b"y" * 10)
+    store.add("c", 1, b"z" * 11)
+    assert len(store) == 1
+    assert store.nearest("a", 1, 0) is None
+    assert store._indexes.keys() == {"b"}
+
+
+def test_store_replaces_result_for_same_hash():
+    store = ResultStore(max_bytes=100)
+    store.add("a", 3, b"old")
+    store.add("a", 3, b"newer")
+    assert store.size == 5
+    assert store.nearest("a", 3, 0) == (0, b"newer")
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from utils.common import split_into_tiles, stitch_tiles, tile_blend_weights, tile_positions
+
+
+def test_tile_positions_small_image_is_one_tile():
+    assert tile_positions(300, 512, 32) == [0]
+    assert tile_positions(512, 512, 32) == [0]
+
+
+def test_tile_positions_are_evenly_spread():
+    # Flush-right placement would give 0/480/488 here
+    assert tile_positions(1000, 512, 32) == [0, 244, 488]
+
+
+@pytest.mark.parametrize("length", [513, 1000, 1500, 2048, 4097])
+def test_tile_positions_cover_with_minimum_overlap(length):
+    positions = tile_positions(length, 512, 32)
+    assert positions[0] == 0
+    assert positions[-1] + 512 == length
+    for previous, current in zip(positions, positions[1:]):
+        assert previous + 512 - current >= 32
+
+
+def test_opposite_ramps_sum_to_one_across_overlap():
+    overlap = 16
+    left = tile_blend_weights(64, 64, (0, 0, 0, overlap))
+    right = tile_blend_weights(64, 64, (0, 0, overlap, 0))
+    np.testing.assert_allclose(left[:, -overlap:] + right[:, :overlap], 1.0, rtol=1e-6)
+    assert np.all(left[:, :-overlap] == 1.0)
+
+
+@pytest.mark.parametrize("shape", [(300, 200), (700, 1000), (1100, 530)])
+def test_stitching_unchanged_tiles_reproduces_the_image(shape):
+    image = np.random.default_rng(0).integers(0, 256, size=(*shape, 3), dtype=np.uint8)
+    tiles = split_into_tiles(image, tile_size=256, overlap=32)
+    stitched = stitch_tiles(tiles, (shape[1], shape[0]), scale=1)
+    np.testing.assert_array_equal(stitched, image)
+
+
+def test_band_height_does_not_change_the_result():
+    image = np.random.default_rng(2).integers(0, 256, size=(530, 610, 3), dtype=np.uint8)
+    tiles = split_into_tiles(image, tile_size=200, overlap=24)
+    upscaled = [(origin, np.repeat(np.repeat(tile, 2, axis=0), 2, axis=1)) for origin, tile in tiles]
+    whole = stitch_tiles(upscaled, (1220, 1060), scale=2, band_rows=2000)
+    banded = stitch_tiles(upscaled, (1220, 1060), scale=2, band_rows=37)
+    np.testing.assert_array_equal(banded, whole)
+
+
+def test_upscale_rejects_oversized_output(monkeypatch):
+    import utils.common as common
+    from PIL import Image
+
+    monkeypatch.setattr(common, "UPSCALE_MAX_OUTPUT_PIXELS", 1000)
+    result, error = common.upscale_image_tiled(Image.new("RGB", (20, 20)), scale=2, api_key="key")
+    assert result is None
+    assert "megapixels" in error
+
+
+def test_stitching_scales_tile_origins():
+    image = np.full((400, 400, 3), 128, dtype=np.uint8)
+    tiles = split_into_tiles(image, tile_size=256, overlap=32)
+    upscaled = [(origin, np.repeat(np.repeat(tile, 2, axis=0), 2, axis=1)) for origin, tile in tiles]
+    stitched = stitch_tiles(upscaled, (800, 800), scale=2)
+    assert stitched.shape == (800, 800, 3)
+    assert np.all(stitched == 128)
+
+
+def test_upscale_tile_reports_non_image_response(monkeypatch):
+    import utils.common as common
+
+    monkeypatch.setattr(common, "make_segmind_api_request", lambda *args, **kwargs: (b'{"error": "busy"}', None))
+    result, error = common.upscale_tile(np.zeros((8, 8, 3), dtype=np.uint8), "esrgan", 2, "key")
+    assert result is None
+    assert error.startswith("Tile returned invalid image:")
@@ -4,8 +4,181 @@ import base64
 import os
 import json
 import time
+import math
+import hashlib
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import BytesIO
+import numpy as np
 from PIL import Image
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# API base URLs (overridable, e.g. to point the app at the load-test mock server)
+SEGMIND_API_BASE = os.environ.get("SEGMIND_API_BASE", "https://api.segmind.com/v1")
+OPENAI_API_BASE = os.environ.get("OPENAI_API_BASE", "https://api.openai.com/v1")
+
+# ---------- Profiling ----------
+PROFILE_LOG_PATH = os.path.join("logs", "profile.jsonl")
+
+PROFILE_TRACE_TIMEOUT = 600
+
+# Reruns currently holding tracemalloc on, by id -> start time; tracing is
+# process-wide, so it is stopped again once none of them is left
+_traced_reruns = {}
+_traced_reruns_lock = threading.Lock()
+
+# Function to check whether per-rerun profiling is switched on
+def profiling_enabled():
+    return os.environ.get("SEGMIND_PROFILE") == "1" or st.session_state.get('profiling_enabled', False)
+
+# Memory tracing slows every allocation in the process, so only the operator can enable it
+def memory_profiling_enabled():
+    return os.environ.get("SEGMIND_PROFILE") == "1"
+
+# Function to release a rerun's hold on tracemalloc, stopping it when unused
+def _release_tracing(profile_id):
+    with _traced_reruns_lock:
+        _traced_reruns.pop(profile_id, None)
+        # Reruns that never reached the panel (exceptions, st.rerun, closed tabs) expire
+        now = time.time()
+        for stale_id, started in list(_traced_reruns.items()):
+            if now - started > PROFILE_TRACE_TIMEOUT:
+                del _traced_reruns[stale_id]
+        if not _traced_reruns and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+# Function to start collecting phase timings for the current rerun
+def start_profiling(page_name):
+    previous = st.session_state.get('_profile')
+    if previous and previous["traced"]:
+        _release_tracing(previous["id"])
+
+    if not profiling_enabled():
+        st.session_state['_profile'] = None
+        return
+
+    traced = memory_profiling_enabled()
+    profile_id = object()
+    if traced:
+        with _traced_reruns_lock:
+            _traced_reruns[profile_id] = time.time()
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    st.session_state['_profile'] = {
+        "id": profile_id,
+        "page": page_name,
+        "timestamp": time.time(),
+        "started": time.perf_counter(),
+        "traced": traced,
+        "start_memory": tracemalloc.get_traced_memory()[0] if traced else 0,
+        "phases": {},
+        "stack": [],
+    }
+
+# Function to read the traced memory, or 0 when this rerun isn't tracing
+def _traced_memory(profile):
+    return tracemalloc.get_traced_memory()[0] if profile["traced"] else 0
+
+# Context manager (also usable as a decorator) that attributes wall time and
+# net retained memory (traced memory after minus before) to a named phase;
+# nested phases are subtracted from their parent
+@contextmanager
+def profile_phase(name):
+    profile = st.session_state.get('_profile') if get_script_run_ctx(suppress_warning=True) else None
+    if not profile:
+        yield
+        return
+
+    frame = {"child_seconds": 0.0, "child_retained": 0}
+    profile["stack"].append(frame)
+    start_memory = _traced_memory(profile)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        retained = _traced_memory(profile) - start_memory
+        profile["stack"].pop()
+        if profile["stack"]:
+            profile["stack"][-1]["child_seconds"] += elapsed
+            profile["stack"][-1]["child_retained"] += retained
+
+        phase = profile["phases"].setdefault(name, {"seconds": 0.0, "net_retained_bytes": 0, "calls": 0})
+        phase["seconds"] += elapsed - frame["child_seconds"]
+        phase["net_retained_bytes"] += retained - frame["child_retained"]
+        phase["calls"] += 1
+
+# Function to close the rerun, log it and render the collapsible profiling panel
+def show_profiling_panel():
+    profile = st.session_state.get('_profile')
+    if not profile:
+        return
+
+    total_seconds = time.perf_counter() - profile["started"]
+    net_retained_bytes = _traced_memory(profile) - profile["start_memory"]
+    if profile["traced"]:
+        _release_tracing(profile["id"])
+    st.session_state['_profile'] = None
+
+    phases = {name: dict(values) for name, values in profile["phases"].items()}
+    attributed_seconds = sum(phase["seconds"] for phase in phases.values())
+    attributed_bytes = sum(phase["net_retained_bytes"] for phase in phases.values())
+    # Whatever ran outside an explicit phase is the script body itself: widgets and layout
+    widgets = phases.setdefault("widgets", {"seconds": 0.0, "net_retained_bytes": 0, "calls": 0})
+    widgets["seconds"] += max(total_seconds - attributed_seconds, 0.0)
+    widgets["net_retained_bytes"] += net_retained_bytes - attributed_bytes
+    widgets["calls"] += 1
+    if not profile["traced"]:
+        for phase in phases.values():
+            phase["net_retained_bytes"] = None
+
+    record = {
+        "page": profile["page"],
+        "timestamp": profile["timestamp"],
+        "total_seconds": round(total_seconds, 6),
+        "net_retained_bytes": net_retained_bytes if profile["traced"] else None,
+        "phases": phases,
+    }
+
+    try:
+        os.makedirs(os.path.dirname(PROFILE_LOG_PATH), exist_ok=True)
+        with open(PROFILE_LOG_PATH, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+
+    with st.expander("⏱️ Profiling"):
+        summary = f"**Rerun total:** {total_seconds * 1000:.1f} ms"
+        if profile["traced"]:
+            summary += f" · **Net retained:** {net_retained_bytes / 1024:.1f} KiB"
+        st.markdown(summary)
+
+        rows = []
+        for name, values in sorted(phases.items(), key=lambda item: -item[1]["seconds"]):
+            row = {
+                "Phase": name,
+                "Time (ms)": round(values["seconds"] * 1000, 2),
+                "Share (%)": round(100 * values["seconds"] / total_seconds, 1) if total_seconds else 0.0,
+                "Calls": values["calls"],
+            }
+            if profile["traced"]:
+                row["Net retained (KiB)"] = round(values["net_retained_bytes"] / 1024, 1)
+            rows.append(row)
+        st.table(rows)
+
+        if profile["traced"]:
+            st.caption(
+                "Net retained = traced memory at the end of a phase minus at its start, so memory "
+                "allocated and freed within the phase doesn't show and values can be negative. "
+                "It is process-wide: other sessions' threads running at the same time are included. "
+                f"Appended to `{PROFILE_LOG_PATH}`"
+            )
+        else:
+            st.caption(f"Memory tracing is off (set SEGMIND_PROFILE=1 to enable). Appended to `{PROFILE_LOG_PATH}`")
 
 # Function to handle API key retrieval
 def get_api_key():
@@ -16,15 +189,15 @@ def get_api_key():
         return None
 
 # Function to convert image file to base64
+@profile_phase("encoding")
 def image_file_to_base64(file):
     return base64.b64encode(file.read()).decode('utf-8')
 
 # Function to convert image URL to base64
 def image_url_to_base64(image_url):
     try:
-        response = requests.get(image_url)
-        response.raise_for_status()  # Raise an exception for 4XX/5XX responses
-        return base64.b64encode(response.content).decode('utf-8')
+        content, _ = fetch_media(image_url)
+        return base64.b64encode(content).decode('utf-8')
     except Exception as e:
         st.error(f"Error fetching image from URL: {str(e)}")
         return None
@@ -41,19 +214,22 @@ def get_image_input(help_text="Upload an image or provide a URL"):
             with st.spinner("Fetching image..."):
                 image_base64 = image_url_to_base64(url_input)
                 if image_base64:
-                    st.image(url_input, caption="Preview", use_column_width=True)
+                    show_remote_image(url_input, caption="Preview", use_column_width=True)
                     image_preview = url_input
     else:
         uploaded_file = st.file_uploader("Upload Image", type=["png", "jpg", "jpeg"], help=help_text)
         if uploaded_file:
             image_base64 = image_file_to_base64(uploaded_file)
-            st.image(uploaded_file, caption="Preview", use_column_width=True)
+            with profile_phase("st.image"):
+                st.image(uploaded_file, caption="Preview", use_column_width=True)
             image_preview = uploaded_file
     
     return image_base64, image_preview
 
 # Function to make API request to Segmind
-def make_segmind_api_request(endpoint, payload, api_key=None):
+# (pass show_spinner=False when calling from a worker thread)
+@profile_phase("network")
+def make_segmind_api_request(endpoint, payload, api_key=None, show_spinner=True):
     if not api_key:
         api_key = get_api_key()
         if not api_key:
@@ -62,8 +238,11 @@ def make_segmind_api_request(endpoint, payload, api_key=None):
     headers = {"x-api-key": api_key}
     
     try:
-        with st.spinner("Processing request..."):
-            response = requests.post(f"https://api.segmind.com/v1/{endpoint}", json=payload, headers=headers)
+        if show_spinner:
+            with st.spinner("Processing request..."):
+                response = requests.post(f"{SEGMIND_API_BASE}/{endpoint}", json=payload, headers=headers)
+        else:
+            response = requests.post(f"{SEGMIND_API_BASE}/{endpoint}", json=payload, headers=headers)
         
         if response.status_code == 200:
             return response.content, None
@@ -72,6 +251,164 @@ def make_segmind_api_request(endpoint, payload, api_key=None):
     except Exception as e:
         return None, f"Request failed: {str(e)}"
 
+# Largest upscaled result accepted (the stitched image and its tiles are held in memory)
+UPSCALE_MAX_OUTPUT_PIXELS = int(os.environ.get("SEGMIND_UPSCALE_MAX_MEGAPIXELS", "64")) * 1_000_000
+STITCH_BAND_ROWS = 256
+
+# Function to compute tile origins along one axis, spread evenly so that every
+# overlap is at least `overlap` and the last tile ends flush with the edge
+def tile_positions(length, tile_size, overlap):
+    if length <= tile_size:
+        return [0]
+    stride = tile_size - overlap
+    count = math.ceil((length - tile_size) / stride) + 1
+    return [round(i * (length - tile_size) / (count - 1)) for i in range(count)]
+
+# Function to split an image array into overlapping tiles
+def split_into_tiles(image_array, tile_size=512, overlap=32):
+    height, width = image_array.shape[:2]
+    tiles = []
+    for top in tile_positions(height, tile_size, overlap):
+        for left in tile_positions(width, tile_size, overlap):
+            tile = image_array[top:top + tile_size, left:left + tile_size]
+            tiles.append(((top, left), tile))
+    return tiles
+
+# Function to build a 1-D blending ramp that fades in/out linearly over each end
+# (0 keeps that end at full weight)
+def axis_blend_weights(length, fade_start, fade_end):
+    weights = np.ones(length, dtype=np.float32)
+    for n, reverse in ((min(fade_start, length // 2), False), (min(fade_end, length // 2), True)):
+        if n > 0:
+            fade = np.arange(1, n + 1, dtype=np.float32) / (n + 1)
+            if reverse:
+                weights[-n:] = np.minimum(weights[-n:], fade[::-1])
+            else:
+                weights[:n] = np.minimum(weights[:n], fade)
+    return weights
+
+# Function to build a tile's blending mask from (top, bottom, left, right) ramp lengths
+def tile_blend_weights(tile_height, tile_width, ramps):
+    top, bottom, left, right = ramps
+    return np.outer(axis_blend_weights(tile_height, top, bottom), axis_blend_weights(tile_width, left, right))
+
+# Function to work out, for each tile origin on one axis, how far it overlaps
+# the previous and the next tile
+def neighbour_overlaps(origins, tile_length):
+    origins = sorted(set(origins))
+    overlaps = {}
+    for i, origin in enumerate(origins):
+        before = origins[i - 1] + tile_length - origin if i > 0 else 0
+        after = origin + tile_length - origins[i + 1] if i + 1 < len(origins) else 0
+        overlaps[origin] = (max(before, 0), max(after, 0))
+    return overlaps
+
+# Function to stitch upscaled tiles back together, feathering the seams; weights
+# are normalised, so the blend is exact wherever the tiles agree. Blending runs
+# in horizontal bands so only `band_rows` rows of float32 buffers exist at once.
+def stitch_tiles(tiles, output_size, scale, band_rows=STITCH_BAND_ROWS):
+    out_width, out_height = output_size
+    tile_height, tile_width, channels = tiles[0][1].shape
+    output = np.empty((out_height, out_width, channels), dtype=np.uint8)
+
+    row_overlaps = neighbour_overlaps([top * scale for (top, _), _ in tiles], tile_height)
+    column_overlaps = neighbour_overlaps([left * scale for (_, left), _ in tiles], tile_width)
+    placed = [
+        (
+            top * scale,
+            left * scale,
+            tile,
+            axis_blend_weights(tile_height, *row_overlaps[top * scale]),
+            axis_blend_weights(tile_width, *column_overlaps[left * scale]),
+        )
+        for (top, left), tile in tiles
+    ]
+
+    for band_top in range(0, out_height, band_rows):
+        band_bottom = min(band_top + band_rows, out_height)
+        canvas = np.zeros((band_bottom - band_top, out_width, channels), dtype=np.float32)
+        weight_sum = np.zeros((band_bottom - band_top, out_width, 1), dtype=np.float32)
+
+        for top, left, tile, row_weights, column_weights in placed:
+            first, last = max(top, band_top), min(top + tile_height, band_bottom)
+            if first >= last:
+                continue
+            weights = np.outer(row_weights[first - top:last - top], column_weights)[..., None]
+            canvas[first - band_top:last - band_top, left:left + tile_width] += (
+                tile[first - top:last - top].astype(np.float32) * weights
+            )
+            weight_sum[first - band_top:last - band_top, left:left + tile_width] += weights
+
+        canvas /= np.maximum(weight_sum, 1e-6)
+        output[band_top:band_bottom] = np.clip(np.rint(canvas), 0, 255).astype(np.uint8)
+
+    return output
+
+# Function to upscale one tile through the Segmind API
+def upscale_tile(tile, endpoint, scale, api_key, extra_payload=None):
+    buffer = BytesIO()
+    Image.fromarray(tile).save(buffer, format="PNG")
+    payload = {"image": base64.b64encode(buffer.getvalue()).decode('utf-8'), "scale": scale}
+    if extra_payload:
+        payload.update(extra_payload)
+
+    result, error = make_segmind_api_request(endpoint, payload, api_key=api_key, show_spinner=False)
+    if error:
+        return None, error
+
+    try:
+        upscaled = Image.open(BytesIO(result)).convert("RGB")
+    except Exception as e:
+        return None, f"Tile returned invalid image: {e}"
+    expected_size = (tile.shape[1] * scale, tile.shape[0] * scale)
+    if upscaled.size != expected_size:
+        upscaled = upscaled.resize(expected_size, Image.LANCZOS)
+    return np.asarray(upscaled), None
+
+# Function to upscale a large image by sending overlapping tiles concurrently
+def upscale_image_tiled(image, endpoint="esrgan", scale=2, tile_size=512, overlap=32,
+                        max_workers=4, api_key=None, extra_payload=None, progress_callback=None):
+    if not api_key:
+        api_key = get_api_key()
+        if not api_key:
+            return None, "API key not provided"
+
+    if image.width * image.height * scale * scale > UPSCALE_MAX_OUTPUT_PIXELS:
+        return None, (
+            f"Output would be {image.width * scale}×{image.height * scale}px; the limit is "
+            f"{UPSCALE_MAX_OUTPUT_PIXELS / 1_000_000:.0f} megapixels. Use a smaller scale or input."
+        )
+
+    image_array = np.asarray(image.convert("RGB"))
+    tiles = split_into_tiles(image_array, tile_size, overlap)
+
+    upscaled_tiles = [None] * len(tiles)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(upscale_tile, tile, endpoint, scale, api_key, extra_payload): index
+            for index, (_, tile) in enumerate(tiles)
+        }
+        completed = 0
+        for future in as_completed(futures):
+            index = futures[future]
+            upscaled, error = future.result()
+            if error:
+                for pending in futures:
+                    pending.cancel()
+                return None, f"Tile {index + 1}/{len(tiles)} failed: {error}"
+            upscaled_tiles[index] = (tiles[index][0], upscaled)
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, len(tiles))
+
+    with profile_phase("encoding"):
+        output_size = (image_array.shape[1] * scale, image_array.shape[0] * scale)
+        stitched = stitch_tiles(upscaled_tiles, output_size, scale)
+
+        buffer = BytesIO()
+        Image.fromarray(stitched).save(buffer, format="PNG")
+    return buffer.getvalue(), None
+
 # Function to save output to file
 def save_output(data, file_extension):
     timestamp = int(time.time())
@@ -96,10 +433,11 @@ def show_result(result, error, file_extension="png"):
     if result:
         st.success("Generation successful!")
         
-        if file_extension == "mp4":
-            st.video(result)
-        else:
-            st.image(result)
+        with profile_phase("st.image"):
+            if file_extension == "mp4":
+                st.video(result)
+            else:
+                st.image(result)
         
         # Save button
         col1, col2 = st.columns([1, 3])
@@ -124,3 +462,247 @@ def show_result(result, error, file_extension="png"):
                     file_name="segmind_result.mp4",
                     mime="video/mp4"
                 )
+
+# ---------- Near-duplicate input detection ----------
+# Maximum Hamming distance (out of 64 bits) for two images to count as the same photo
+# (clamped to the range the page sliders offer)
+PHASH_THRESHOLD_MAX = 16
+PHASH_THRESHOLD = min(max(int(os.environ.get("SEGMIND_PHASH_THRESHOLD", "6")), 0), PHASH_THRESHOLD_MAX)
+
+# DCT-II basis used by the perceptual hash
+_DCT_SIZE = 32
+_DCT_MATRIX = np.cos(
+    np.pi / _DCT_SIZE * (np.arange(_DCT_SIZE)[None, :] + 0.5) * np.arange(_DCT_SIZE)[:, None]
+)
+
+# Function to compute a 64-bit perceptual hash (pHash) of base64 image data;
+# survives resizing, re-compression and metadata stripping
+@profile_phase("encoding")
+def perceptual_hash(image_base64):
+    try:
+        image = Image.open(BytesIO(base64.b64decode(image_base64)))
+        pixels = np.asarray(image.convert("L").resize((_DCT_SIZE, _DCT_SIZE), Image.LANCZOS), dtype=np.float32)
+    except Exception:
+        return None
+    coefficients = (_DCT_MATRIX @ pixels @ _DCT_MATRIX.T)[:8, :8].flatten()
+    bits = coefficients > np.median(coefficients[1:])
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+# BK-tree over Hamming distance: lookups only descend into branches that can
+# hold a hash within the threshold, so they stay fast as the index grows
+class PerceptualHashIndex:
+    def __init__(self, hashes=()):
+        self._hashes = set()
+        self._root = None
+        for phash in hashes:
+            self.add(phash)
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add(self, phash):
+        if phash in self._hashes:
+            return
+        self._hashes.add(phash)
+        node = [phash, {}]
+        if self._root is None:
+            self._root = node
+            return
+        current = self._root
+        while True:
+            distance = bin(current[0] ^ phash).count("1")
+            child = current[1].get(distance)
+            if child is None:
+                current[1][distance] = node
+                return
+            current = child
+
+    def nearest(self, phash, max_distance):
+        best = None
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            distance = bin(node[0] ^ phash).count("1")
+            if distance <= max_distance and (best is None or distance < best[0]):
+                best = (distance, node[0])
+            for edge, child in node[1].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return best
+
+# Earlier results keyed by (scope, hash) with one BK-tree per scope, capped by
+# total bytes and evicted least recently used first
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("SEGMIND_RESULT_CACHE_MB", "256")) * 1024 * 1024
+
+class ResultStore:
+    def __init__(self, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, key):
+        scope, phash = key
+        self.size -= len(self._entries.pop(key))
+        # BK-trees don't support deletion; rebuild the scope from what is left
+        remaining = [entry_hash for entry_scope, entry_hash in self._entries if entry_scope == scope]
+        if remaining:
+            self._indexes[scope] = PerceptualHashIndex(remaining)
+        else:
+            del self._indexes[scope]
+
+    def add(self, scope, phash, result):
+        if len(result) > self.max_bytes:
+            return
+        key = (scope, phash)
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key))
+            self._entries[key] = result
+            self.size += len(result)
+            self._indexes.setdefault(scope, PerceptualHashIndex()).add(phash)
+            while self.size > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+
+    def nearest(self, scope, phash, max_distance):
+        with self._lock:
+            index = self._indexes.get(scope)
+            match = index.nearest(phash, max_distance) if index else None
+            if match is None:
+                return None
+            distance, match_hash = match
+            self._entries.move_to_end((scope, match_hash))
+            return distance, self._entries[(scope, match_hash)]
+
+# Shared across sessions; results are scoped per API key, endpoint and parameters
+@st.cache_resource
+def get_result_store():
+    return ResultStore()
+
+# Function to build the lookup scope so only identical settings are ever reused
+def result_scope(endpoint, params, api_key):
+    key_digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+    return (key_digest, endpoint, json.dumps(params, sort_keys=True, default=str))
+
+# Function to find an earlier result for a near-identical image with the same settings
+# (phash comes from perceptual_hash, computed once per generation by the caller)
+def find_previous_result(phash, endpoint, params, api_key, threshold=PHASH_THRESHOLD):
+    if phash is None:
+        return None
+    return get_result_store().nearest(result_scope(endpoint, params, api_key), phash, threshold)
+
+# Function to remember a result so near-duplicate inputs can reuse it
+def remember_result(phash, endpoint, params, api_key, result):
+    if phash is None:
+        return
+    get_result_store().add(result_scope(endpoint, params, api_key), phash, result)
+
+# ---------- Remote media cache ----------
+# Remote images are fetched once per process and served to every session from
+# memory through Streamlit's own media endpoint instead of a third-party URL
+MEDIA_CACHE_MAX_BYTES = int(os.environ.get("SEGMIND_MEDIA_CACHE_MB", "256")) * 1024 * 1024
+MEDIA_FETCH_TIMEOUT = 30
+MEDIA_FAILURE_TTL = 60
+MEDIA_FAILURE_MAX_ENTRIES = 256
+
+class MediaCache:
+    def __init__(self, max_bytes=MEDIA_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._failures = OrderedDict()
+        self._fetch_locks = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, url):
+        with self._lock:
+            if url in self._entries:
+                self._entries.move_to_end(url)
+                return self._entries[url]
+            self._prune_failures()
+            if url in self._failures:
+                # A fresh exception each time: re-raising a shared one keeps growing its traceback
+                raise OSError(self._failures[url][1])
+            return None
+
+    # Caller holds self._lock; failures are kept oldest first
+    def _prune_failures(self):
+        cutoff = time.time() - MEDIA_FAILURE_TTL
+        while self._failures and next(iter(self._failures.values()))[0] < cutoff:
+            self._failures.popitem(last=False)
+
+    # Caller holds self._lock
+    def _record_failure(self, url, error):
+        self._failures.pop(url, None)
+        self._failures[url] = (time.time(), f"{type(error).__name__}: {error}")
+        self._prune_failures()
+        while len(self._failures) > MEDIA_FAILURE_MAX_ENTRIES:
+            self._failures.popitem(last=False)
+
+    # Caller holds self._lock
+    def _store(self, url, entry):
+        entry_size = len(entry[0])
+        if entry_size > self.max_bytes:
+            return
+        if url in self._entries:
+            self.size -= len(self._entries.pop(url)[0])
+        self._entries[url] = entry
+        self.size += entry_size
+        # Least recently used entries go first
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted[0])
+
+    def get(self, url, fetch):
+        entry = self._lookup(url)
+        if entry is not None:
+            return entry
+
+        # One fetch per URL even when several sessions ask at once
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(url, threading.Lock())
+        with fetch_lock:
+            entry = self._lookup(url)
+            if entry is None:
+                try:
+                    entry = fetch(url)
+                except Exception as e:
+                    with self._lock:
+                        self._record_failure(url, e)
+                        self._fetch_locks.pop(url, None)
+                    raise
+                # The entry must be visible before the fetch lock disappears,
+                # or a request arriving in between would download it again
+                with self._lock:
+                    self._store(url, entry)
+                    self._failures.pop(url, None)
+                    self._fetch_locks.pop(url, None)
+        return entry
+
+@st.cache_resource
+def get_media_cache():
+    return MediaCache()
+
+# Function to download a remote file, returning its bytes and content type
+@profile_phase("network")
+def download_media(url):
+    response = requests.get(url, timeout=MEDIA_FETCH_TIMEOUT)
+    response.raise_for_status()  # Raise an exception for 4XX/5XX responses
+    return response.content, response.headers.get("Content-Type", "")
+
+# Function to get a remote file through the shared cache (raises on fetch errors)
+def fetch_media(url):
+    return get_media_cache().get(url, download_media)
+
+# Function to display a remote image from the local cache, falling back to the URL
+# when it can't be fetched or isn't a raster image Streamlit can decode
+def show_remote_image(url, **kwargs):
+    with profile_phase("st.image"):
+        try:
+            st.image(fetch_media(url)[0], **kwargs)
+        except Exception:
+            st.image(url, **kwargs)